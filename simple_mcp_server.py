@@ -4,15 +4,25 @@ Simple MCP Server for GitHub Repository Creation
 """
 
 import asyncio
-import json
 import logging
 import os
+import random
+import stat
 import sys
-from typing import Any, Dict, List
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
 
 import httpx
+import orjson
 from dotenv import load_dotenv
 
+try:
+    import uvloop
+except ImportError:  # not available on Windows
+    uvloop = None  # type: ignore[assignment]
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -25,25 +35,213 @@ GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 if not GITHUB_TOKEN:
     logger.error("GITHUB_TOKEN not found in environment variables. Please set it in your .env file or environment.")
     sys.exit(1)
-GITHUB_API_URL = "https://api.github.com/user/repos"
+GITHUB_API_BASE_URL = "https://api.github.com"
+# Read-only request headers shared by every GitHub call
+_AUTH_HEADERS = MappingProxyType({
+    "Authorization": f"token {GITHUB_TOKEN}",
+    "Accept": "application/vnd.github+json"
+})
+USERNAME_CACHE_TTL = 3600  # seconds
+MAX_ATTEMPTS = 5  # tries per GitHub request, including the first
+MAX_RETRY_DELAY = 60  # seconds; longer waits fail fast instead
+RETRY_STATUSES = (502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "DELETE")  # safe to resend after a gateway error
+STDIO_LINE_LIMIT = 16 * 1024 * 1024  # max bytes per stdin message
+OUTPUT_QUEUE_SIZE = 1024  # responses buffered ahead of the stdout writer
+TOOLS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tools.json")
+
+def _load_tools() -> List[Dict[str, Any]]:
+    """Read the tool definitions returned by tools/list"""
+    with open(TOOLS_FILE, "rb") as tools_file:
+        tools: List[Dict[str, Any]] = orjson.loads(tools_file.read())
+    return tools
+
+# Tool definitions for tools/list, parsed once at import
+_TOOLS = _load_tools()
+
+class ToolInputError(Exception):
+    """Tool was called with missing or invalid arguments"""
+
+class ToolError(Exception):
+    """Tool failed; the message is shown to the client as-is"""
+
+class GitHubError(Exception):
+    """GitHub API returned an unsuccessful response"""
+    def __init__(self, message: str, status_code: int):
+        super().__init__(f"{message} (Status: {status_code})")
+        self.status_code = status_code
+
+class GhRateLimited(GitHubError):
+    """GitHub rejected the request due to rate limiting"""
+
+class GhNotFound(GitHubError):
+    """Requested GitHub resource does not exist"""
+
+class GhServerError(GitHubError):
+    """GitHub returned a 5xx server error"""
+
+# A JSON-RPC response, either as a dict or pre-rendered bytes
+JSONRPCResponse = Union[Dict[str, Any], bytes]
+# handler(message, msg_id) for a JSON-RPC method
+MethodHandler = Callable[[Dict[str, Any], Any], Awaitable[JSONRPCResponse]]
+# handler(arguments) for a tool, returning its success text
+ToolHandler = Callable[[Dict[str, Any]], Awaitable[str]]
+
+# Pre-rendered JSON-RPC envelopes for tools/call text results;
+# only the id and the text are filled in per response
+_SUCCESS_TMPL = b'{"jsonrpc":"2.0","id":%s,"result":{"content":[{"type":"text","text":%s}]}}'
+_ERROR_TMPL = b'{"jsonrpc":"2.0","id":%s,"result":{"content":[{"type":"text","text":%s}],"isError":true}}'
+
+def _json(response: httpx.Response) -> Any:
+    """Parse an httpx response body straight from bytes with orjson"""
+    return orjson.loads(response.content)
+
+def _error_message(response: httpx.Response) -> str:
+    """Return GitHub's error message, skipping the parse for empty bodies"""
+    if not response.content:
+        return "Unknown error"
+    try:
+        return _json(response).get("message", "Unknown error")
+    except orjson.JSONDecodeError:
+        # e.g. an HTML page from a proxy in front of the API
+        return "Unknown error"
+
+def _github_error(response: httpx.Response) -> "GitHubError":
+    """Build the GitHubError subclass matching an unsuccessful response"""
+    status = response.status_code
+    message = _error_message(response)
+    # Secondary rate limits are a 403 with Retry-After but no remaining count
+    if status == 429 or (status == 403 and (
+        response.headers.get("x-ratelimit-remaining") == "0" or "retry-after" in response.headers
+    )):
+        return GhRateLimited(message, status)
+    if status == 404:
+        return GhNotFound(message, status)
+    if status >= 500:
+        return GhServerError(message, status)
+    return GitHubError(message, status)
+
+def _retry_delay(method: str, response: httpx.Response, error: "GitHubError", attempt: int) -> Optional[float]:
+    """Seconds to wait before retrying a failed request, or None if it shouldn't be retried"""
+    if isinstance(error, GhRateLimited):
+        retry_after = response.headers.get("retry-after")
+        reset = response.headers.get("x-ratelimit-reset")
+        try:
+            if retry_after is not None:
+                delay = float(retry_after)
+            elif reset is not None:
+                delay = float(reset) - time.time()
+            else:
+                delay = 2 ** attempt
+        except ValueError:
+            # e.g. Retry-After given as an HTTP date
+            delay = 2 ** attempt
+    elif error.status_code in RETRY_STATUSES and method in IDEMPOTENT_METHODS:
+        # The request may have been applied before the gateway failed,
+        # so only resend it if doing so twice is harmless
+        delay = 2 ** attempt
+    else:
+        return None
+    
+    # Jitter spreads out retries from concurrent requests
+    delay = max(delay, 0) + random.random()
+    return delay if delay <= MAX_RETRY_DELAY else None
+
+def _text_result(msg_id: Any, text: str, is_error: bool = False) -> bytes:
+    """Render a tools/call text result directly to JSON-RPC bytes"""
+    template = _ERROR_TMPL if is_error else _SUCCESS_TMPL
+    return template % (orjson.dumps(msg_id), orjson.dumps(text))
 
 class SimpleMCPServer:
-    def __init__(self):
+    def __init__(self) -> None:
         self.server_name = "github-repo-creator"
         self.server_version = "1.0.0"
+        # Shared client so every tool call reuses pooled connections;
+        # HTTP/2 lets concurrent calls multiplex over one TLS connection
+        self.client = httpx.AsyncClient(
+            base_url=GITHUB_API_BASE_URL,
+            http2=True,
+            headers=_AUTH_HEADERS,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        )
+        # Static results for initialize and tools/list, built once and
+        # shared by every response envelope
+        self._initialize_result = {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {
+                "tools": {}
+            },
+            "serverInfo": {
+                "name": self.server_name,
+                "version": self.server_version
+            }
+        }
+        self._tools_list_result = {
+            "tools": _TOOLS
+        }
+        # Dispatch tables for JSON-RPC methods and tools
+        self._methods: Dict[str, MethodHandler] = {
+            "initialize": self.handle_initialize,
+            "tools/list": self.handle_list_tools,
+            "tools/call": self.handle_call_tool
+        }
+        # Each tool maps to its handler and the action named in error
+        # messages, as "Failed to <action>" and "Error <gerund>"
+        self._tools: Dict[str, Tuple[ToolHandler, str, str]] = {
+            "create_github_repository": (self.create_github_repository, "create repository", "creating repository"),
+            "delete_github_repository": (self.delete_github_repository, "delete repository", "deleting repository")
+        }
+        # Authenticated username and the time it was fetched
+        self._username: Optional[str] = None
+        self._username_fetched_at = 0.0
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client"""
+        await self.client.aclose()
+
+    async def _request(self, method: str, url: str, expected_status: int, **kwargs: Any) -> httpx.Response:
+        """Send a GitHub API request, raising a GitHubError unless it returns expected_status
+        
+        Rate-limited responses, and 502/503/504 for GET/DELETE, are retried up to
+        MAX_ATTEMPTS times with exponential backoff and jitter, honoring
+        Retry-After / X-RateLimit-Reset when GitHub sends them.
+        """
+        attempt = 0
+        while True:
+            response = await self.client.request(method, url, **kwargs)
+            if response.status_code == expected_status:
+                return response
+            
+            error = _github_error(response)
+            attempt += 1
+            delay = _retry_delay(method, response, error, attempt - 1)
+            if delay is None or attempt >= MAX_ATTEMPTS:
+                raise error
+            logger.warning("GitHub %s %s returned %d, retrying in %.1fs", method, url, response.status_code, delay)
+            await asyncio.sleep(delay)
+
+    async def _get_username(self) -> str:
+        """Return the authenticated user's login, cached for USERNAME_CACHE_TTL seconds"""
+        now = time.monotonic()
+        if self._username and now - self._username_fetched_at < USERNAME_CACHE_TTL:
+            return self._username
         
-    async def handle_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            user_response = await self._request("GET", "/user", 200)
+        except GitHubError as github_error:
+            raise ToolError(f"❌ Failed to get user info: {github_error.status_code}") from github_error
+        username = _json(user_response).get("login")
+        self._username = username
+        self._username_fetched_at = now
+        return username
+        
+    async def handle_message(self, message: Dict[str, Any]) -> JSONRPCResponse:
         """Handle incoming MCP messages"""
-        method = message.get("method")
+        method: Any = message.get("method")
         msg_id = message.get("id")
         
-        if method == "initialize":
-            return self.handle_initialize(message, msg_id)
-        elif method == "tools/list":
-            return self.handle_list_tools(msg_id)
-        elif method == "tools/call":
-            return await self.handle_call_tool(message, msg_id)
-        else:
+        handler = self._methods.get(method) if isinstance(method, str) else None
+        if handler is None:
             return {
                 "jsonrpc": "2.0",
                 "id": msg_id,
@@ -52,98 +250,32 @@ class SimpleMCPServer:
                     "message": f"Method not found: {method}"
                 }
             }
+        return await handler(message, msg_id)
     
-    def handle_initialize(self, message: Dict[str, Any], msg_id: int) -> Dict[str, Any]:
+    async def handle_initialize(self, message: Dict[str, Any], msg_id: Any) -> JSONRPCResponse:
         """Handle initialization request"""
         return {
             "jsonrpc": "2.0",
             "id": msg_id,
-            "result": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {
-                    "tools": {}
-                },
-                "serverInfo": {
-                    "name": self.server_name,
-                    "version": self.server_version
-                }
-            }
+            "result": self._initialize_result
         }
     
-    def handle_list_tools(self, msg_id: int) -> Dict[str, Any]:
+    async def handle_list_tools(self, message: Dict[str, Any], msg_id: Any) -> JSONRPCResponse:
         """Handle tools/list request"""
         return {
             "jsonrpc": "2.0",
             "id": msg_id,
-            "result": {
-                "tools": [
-                    {
-                        "name": "create_github_repository",
-                        "description": "Create a new GitHub repository",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "name": {
-                                    "type": "string",
-                                    "description": "Name of the repository to create"
-                                },
-                                "private": {
-                                    "type": "boolean",
-                                    "description": "Whether the repository should be private",
-                                    "default": False
-                                },
-                                "description": {
-                                    "type": "string",
-                                    "description": "Description of the repository"
-                                },
-                                "auto_init": {
-                                    "type": "boolean",
-                                    "description": "Initialize repository with README",
-                                    "default": True
-                                }
-                            },
-                            "required": ["name"]
-                        }
-                    },
-                    {
-                        "name": "delete_github_repository",
-                        "description": "Delete a GitHub repository",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "name": {
-                                    "type": "string",
-                                    "description": "Name of the repository to delete"
-                                }
-                            },
-                            "required": ["name"]
-                        }
-                    }
-                ]
-            }
+            "result": self._tools_list_result
         }
     
-    async def handle_call_tool(self, message: Dict[str, Any], msg_id: int) -> Dict[str, Any]:
+    async def handle_call_tool(self, message: Dict[str, Any], msg_id: Any) -> JSONRPCResponse:
         """Handle tools/call request"""
         params = message.get("params", {})
         tool_name = params.get("name")
         arguments = params.get("arguments", {})
         
-        if tool_name == "create_github_repository":
-            result = await self.create_github_repository(arguments)
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "result": result
-            }
-        if tool_name == "delete_github_repository":
-            result = await self.delete_github_repository(arguments)
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "result": result
-            }
-        else:
+        entry = self._tools.get(tool_name) if isinstance(tool_name, str) else None
+        if entry is None:
             return {
                 "jsonrpc": "2.0",
                 "id": msg_id,
@@ -152,195 +284,289 @@ class SimpleMCPServer:
                     "message": f"Unknown tool: {tool_name}"
                 }
             }
-    
-    async def create_github_repository(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a GitHub repository"""
+        
+        tool, action, gerund = entry
         try:
-            repo_name = arguments.get("name")
-            if not repo_name:
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": "Error: Repository name is required"
-                        }
-                    ],
-                    "isError": True
-                }
-            
-            # Prepare GitHub API request
-            headers = {
-                "Authorization": f"token {GITHUB_TOKEN}",
-                "Accept": "application/vnd.github+json"
-            }
-            
-            json_data = {
-                "name": repo_name,
-                "private": arguments.get("private", False),
-                "auto_init": arguments.get("auto_init", True)
-            }
-            
-            if "description" in arguments:
-                json_data["description"] = arguments["description"]
-            
-            # Call GitHub API
-            async with httpx.AsyncClient() as client:
-                response = await client.post(GITHUB_API_URL, json=json_data, headers=headers)
-            
-            if response.status_code == 201:
-                repo_data = response.json()
-                repo_url = repo_data.get("html_url", "Unknown")
-                
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"✅ Successfully created GitHub repository '{repo_name}'!\n\nRepository URL: {repo_url}\nClone URL: {repo_data.get('clone_url', 'Unknown')}"
-                        }
-                    ]
-                }
-            else:
-                error_data = response.json()
-                error_message = error_data.get("message", "Unknown error")
-                
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"❌ Failed to create repository: {error_message} (Status: {response.status_code})"
-                        }
-                    ],
-                    "isError": True
-                }
-                
+            text = await tool(arguments)
+        except ToolInputError as input_error:
+            return _text_result(msg_id, f"Error: {input_error}", is_error=True)
+        except ToolError as tool_error:
+            return _text_result(msg_id, str(tool_error), is_error=True)
+        except GitHubError as github_error:
+            return _text_result(msg_id, f"❌ Failed to {action}: {github_error}", is_error=True)
         except Exception as e:
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": f"❌ Error creating repository: {str(e)}"
-                    }
-                ],
-                "isError": True
-            }
+            return _text_result(msg_id, f"❌ Error {gerund}: {str(e)}", is_error=True)
+        return _text_result(msg_id, text)
+    
+    async def create_github_repository(self, arguments: Dict[str, Any]) -> str:
+        """Create a GitHub repository"""
+        repo_name = arguments.get("name")
+        if not repo_name:
+            raise ToolInputError("Repository name is required")
+        
+        # Prepare GitHub API request
+        json_data = {
+            "name": repo_name,
+            "private": arguments.get("private", False),
+            "auto_init": arguments.get("auto_init", True)
+        }
+        
+        if "description" in arguments:
+            json_data["description"] = arguments["description"]
+        
+        # Call GitHub API
+        response = await self._request("POST", "/user/repos", 201, json=json_data)
+        
+        # Parse the body once, only on success
+        repo_data = _json(response)
+        repo_url = repo_data.get("html_url", "Unknown")
+        
+        return f"✅ Successfully created GitHub repository '{repo_name}'!\n\nRepository URL: {repo_url}\nClone URL: {repo_data.get('clone_url', 'Unknown')}"
 
-    async def delete_github_repository(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    async def delete_github_repository(self, arguments: Dict[str, Any]) -> str:
         """Delete a GitHub repository"""
-        try:
-            repo_name = arguments.get("name")
-            if not repo_name:
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": "Error: Repository name is required"
-                        }
-                    ],
-                    "isError": True
-                }
-            
-            # Prepare GitHub API request
-            headers = {
-                "Authorization": f"token {GITHUB_TOKEN}",
-                "Accept": "application/vnd.github+json"
-            }
-            
-            # Get the username from the token
-            async with httpx.AsyncClient() as client:
-                # First, get user info to get the username
-                user_response = await client.get("https://api.github.com/user", headers=headers)
-                if user_response.status_code != 200:
-                    return {
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": f"❌ Failed to get user info: {user_response.status_code}"
-                            }
-                        ],
-                        "isError": True
-                    }
-                
-                user_data = user_response.json()
-                username = user_data.get("login")
-                
-                # Now delete the repository using the full path
-                delete_url = f"https://api.github.com/repos/{username}/{repo_name}"
-                response = await client.delete(delete_url, headers=headers)
-            
-            if response.status_code == 204:
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"✅ Successfully deleted GitHub repository '{repo_name}'"
-                        }
-                    ]
-                }
-            else:
-                error_data = response.json()
-                error_message = error_data.get("message", "Unknown error")
-                
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"❌ Failed to delete repository: {error_message} (Status: {response.status_code})"
-                        }
-                    ],
-                    "isError": True
-                }
-                
-        except Exception as e:
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": f"❌ Error deleting repository: {str(e)}"
-                    }
-                ],
-                "isError": True
-            }
+        repo_name = arguments.get("name")
+        if not repo_name:
+            raise ToolInputError("Repository name is required")
+        
+        username = await self._get_username()
+        
+        # Now delete the repository using the full path; 204 has no body
+        await self._request("DELETE", f"/repos/{username}/{repo_name}", 204)
+        
+        return f"✅ Successfully deleted GitHub repository '{repo_name}'"
 
-async def main():
+async def main() -> None:
     """Main function to run the MCP server"""
     server = SimpleMCPServer()
+    try:
+        await serve(server)
+    finally:
+        await server.aclose()
+
+def _is_pipe(fd: int) -> bool:
+    """Whether fd is a pipe or socket, the only kinds pipe transports support"""
+    mode = os.fstat(fd).st_mode
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)
+
+def _pump_stdin(loop: asyncio.AbstractEventLoop, reader: asyncio.StreamReader, fd: int) -> None:
+    """Feed chunks read from fd into reader until EOF (runs in a thread)"""
+    try:
+        while True:
+            # os.read returns whatever is available, so a TTY line arrives
+            # as soon as it is entered rather than at EOF
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            loop.call_soon_threadsafe(reader.feed_data, chunk)
+        loop.call_soon_threadsafe(reader.feed_eof)
+    except (OSError, RuntimeError):
+        # stdin failed, or the loop closed while we were blocked
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(reader.feed_eof)
+
+async def open_stdin() -> asyncio.StreamReader:
+    """Attach a non-blocking asyncio stream to stdin"""
+    loop = asyncio.get_running_loop()
+    fd = sys.stdin.fileno()
     
-    print(f"🚀 Starting {server.server_name} MCP server...", file=sys.stderr)
-    print("Ready to receive MCP messages on stdin/stdout", file=sys.stderr)
+    reader = asyncio.StreamReader(limit=STDIO_LINE_LIMIT)
+    if not _is_pipe(fd):
+        # Pipe transports reject regular files and misbehave on TTYs and
+        # /dev/null, so read those from a daemon thread; unlike the default
+        # executor it can't keep the process alive while blocked on a TTY
+        threading.Thread(target=_pump_stdin, args=(loop, reader, fd), daemon=True).start()
+        return reader
+    
+    protocol = asyncio.StreamReaderProtocol(reader)
+    await loop.connect_read_pipe(lambda: protocol, sys.stdin)
+    return reader
+
+async def open_stdout() -> Optional[asyncio.StreamWriter]:
+    """Attach a non-blocking asyncio stream to stdout, or None if it isn't a pipe"""
+    if not _is_pipe(sys.stdout.fileno()):
+        # TTYs, /dev/null and regular files get plain blocking writes;
+        # none of them wait on a slow reader the way a pipe can
+        return None
     
-    # Read from stdin, write to stdout
+    loop = asyncio.get_running_loop()
+    # StreamReaderProtocol (unlike FlowControlMixin) supports wait_closed()
+    transport, protocol = await loop.connect_write_pipe(lambda: asyncio.StreamReaderProtocol(asyncio.StreamReader()), sys.stdout)
+    return asyncio.StreamWriter(transport, protocol, None, loop)
+
+def _content_length(headers: List[bytes]) -> Optional[int]:
+    """Return the Content-Length from a header block, or None if missing or invalid"""
+    for header in headers:
+        name, _, value = header.partition(b":")
+        if name.strip().lower() == b"content-length":
+            try:
+                length = int(value)
+            except ValueError:
+                return None
+            return length if 0 <= length <= STDIO_LINE_LIMIT else None
+    return None
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[Tuple[bytes, bool]]:
+    """Read the next (body, framed) message from stdin, or None at EOF
+    
+    Messages are either newline-delimited JSON or LSP-style framed: a
+    block of "Name: value" headers including Content-Length, a blank
+    line, then exactly that many bytes of body. A header block without a
+    usable Content-Length is returned as the (unparseable) framed body so
+    the client gets a framed parse error.
+    """
     while True:
-        try:
-            # Read a line from stdin
-            line = await asyncio.get_event_loop().run_in_executor(None, sys.stdin.readline)
-            if not line:
+        line = await reader.readline()
+        if not line:
+            return None
+        # Blank lines are skipped; isspace() avoids a strip() copy
+        if line.isspace():
+            continue
+        # JSON lines start with "{", so the first byte picks the fast path
+        if not (line[:1].isalpha() and b":" in line):
+            return line, False
+        
+        # Read the rest of the header block up to the blank separator line
+        headers = [line]
+        while True:
+            header = await reader.readline()
+            if not header or header.isspace():
                 break
-            
-            # Parse the JSON message
-            message = json.loads(line.strip())
-            
-            # Handle the message
-            response = await server.handle_message(message)
-            
-            # Send the response
-            print(json.dumps(response), flush=True)
-            
-        except json.JSONDecodeError as e:
-            print(json.dumps({
-                "jsonrpc": "2.0",
-                "error": {
-                    "code": -32700,
-                    "message": f"Parse error: {str(e)}"
-                }
-            }), flush=True)
-        except Exception as e:
-            print(json.dumps({
-                "jsonrpc": "2.0",
-                "error": {
-                    "code": -32603,
-                    "message": f"Internal error: {str(e)}"
-                }
-            }), flush=True)
+            headers.append(header)
+        
+        length = _content_length(headers)
+        if length is None:
+            return b"".join(headers), True
+        try:
+            return await reader.readexactly(length), True
+        except asyncio.IncompleteReadError:
+            return None
+
+async def write_output(out_queue: "asyncio.Queue[bytes]", writer: Optional[asyncio.StreamWriter]) -> None:
+    """Single writer task draining queued responses to stdout"""
+    while True:
+        data = await out_queue.get()
+        try:
+            # Flush (or wait for the pipe) once per burst rather than per message
+            if writer is None:
+                sys.stdout.buffer.write(data)
+                if out_queue.empty():
+                    sys.stdout.buffer.flush()
+            else:
+                writer.write(data)
+                # A lost connection is only reported by drain()
+                if out_queue.empty() or writer.is_closing():
+                    await writer.drain()
+        finally:
+            out_queue.task_done()
+
+async def write_message(out_queue: "asyncio.Queue[bytes]", message: JSONRPCResponse, framed: bool = False) -> None:
+    """Queue a single JSON-RPC message for stdout"""
+    # Pre-rendered responses are already bytes and skip the encoder
+    if not isinstance(message, bytes):
+        message = orjson.dumps(message)
+    # Reply in the same framing the request arrived in
+    if framed:
+        data = b"Content-Length: %d\r\n\r\n" % len(message) + message
+    else:
+        data = message + b"\n"
+    # Only the writer task touches stdout, so messages never interleave
+    await out_queue.put(data)
+
+async def dispatch(server: SimpleMCPServer, out_queue: "asyncio.Queue[bytes]", body: bytes, framed: bool) -> None:
+    """Parse one stdin message, handle it and write the response"""
+    try:
+        # Parse the JSON message
+        message = orjson.loads(body)
+        
+        # Handle the message
+        response = await server.handle_message(message)
+        
+        # Send the response
+        await write_message(out_queue, response, framed)
+        
+    except orjson.JSONDecodeError as parse_error:
+        await write_message(out_queue, {
+            "jsonrpc": "2.0",
+            "error": {
+                "code": -32700,
+                "message": f"Parse error: {str(parse_error)}"
+            }
+        }, framed)
+    except Exception as e:
+        await write_message(out_queue, {
+            "jsonrpc": "2.0",
+            "error": {
+                "code": -32603,
+                "message": f"Internal error: {str(e)}"
+            }
+        }, framed)
+
+async def read_requests(server: SimpleMCPServer, reader: asyncio.StreamReader, out_queue: "asyncio.Queue[bytes]", tasks: Set["asyncio.Task[None]"]) -> None:
+    """Dispatch each stdin message in its own task until EOF"""
+    # Separate tasks mean slow GitHub calls don't block other in-flight requests
+    while True:
+        item = await read_message(reader)
+        if item is None:
+            return
+        body, framed = item
+        task = asyncio.create_task(dispatch(server, out_queue, body, framed))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+async def finish_requests(tasks: Set["asyncio.Task[None]"], out_queue: "asyncio.Queue[bytes]") -> None:
+    """Wait for in-flight requests and for their responses to be written"""
+    await asyncio.gather(*tasks)
+    await out_queue.join()
+
+async def serve(server: SimpleMCPServer) -> None:
+    """Read MCP messages from stdin and write responses to stdout"""
+    print(f"🚀 Starting {server.server_name} MCP server...", file=sys.stderr)
+    print("Ready to receive MCP messages on stdin/stdout", file=sys.stderr)
+    
+    reader = await open_stdin()
+    writer = await open_stdout()
+    out_queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=OUTPUT_QUEUE_SIZE)
+    tasks: Set["asyncio.Task[None]"] = set()
+    
+    # The writer task only ever finishes by failing (e.g. the client closed
+    # stdout), so each phase below also stops as soon as it does
+    writer_task = asyncio.create_task(write_output(out_queue, writer))
+    read_task = asyncio.create_task(read_requests(server, reader, out_queue, tasks))
+    finish_task: Optional["asyncio.Task[None]"] = None
+    try:
+        await asyncio.wait({read_task, writer_task}, return_when=asyncio.FIRST_COMPLETED)
+        if read_task.done():
+            read_task.result()
+            # Let in-flight requests finish and their responses drain before shutting down
+            finish_task = asyncio.create_task(finish_requests(tasks, out_queue))
+            await asyncio.wait({finish_task, writer_task}, return_when=asyncio.FIRST_COMPLETED)
+            if finish_task.done() and writer is not None:
+                # Closing flushes whatever the pipe transport still buffers
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except ConnectionError as close_error:
+                    logger.error("Stopped writing to stdout: %r", close_error)
+        if writer_task.done():
+            logger.error("Stopped writing to stdout: %r", writer_task.exception())
+    finally:
+        pending = [read_task, writer_task, *tasks]
+        if finish_task is not None:
+            pending.append(finish_task)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if writer is not None:
+            writer.close()
+
+def run() -> None:
+    """Run the server, on the libuv-based event loop when it's installed and stdio is piped"""
+    # uvloop only pays off for pipe transports; TTYs and files use the default loop
+    if uvloop is not None and _is_pipe(sys.stdin.fileno()) and _is_pipe(sys.stdout.fileno()):
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    run()
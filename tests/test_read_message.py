@@ -0,0 +1,68 @@
+"""
+Tests for stdin message framing in read_message
+"""
+
+import asyncio
+import os
+import unittest
+
+# The server refuses to import without a token
+os.environ.setdefault("GITHUB_TOKEN", "test-token")
+
+from simple_mcp_server import STDIO_LINE_LIMIT, read_message
+
+
+def make_reader(data: bytes) -> asyncio.StreamReader:
+    """Build a StreamReader that yields data and then EOF"""
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+def framed(body: bytes, *headers: bytes) -> bytes:
+    """Frame body with the given header lines and a blank separator"""
+    return b"".join(header + b"\r\n" for header in headers) + b"\r\n" + body
+
+
+BODY = b'{"jsonrpc":"2.0","id":1,"method":"initialize"}'
+
+
+class ReadMessageTest(unittest.IsolatedAsyncioTestCase):
+    async def test_json_lines(self):
+        reader = make_reader(b'\n{"id":1}\n\r\n{"id":2}\n')
+        self.assertEqual(await read_message(reader), (b'{"id":1}\n', False))
+        self.assertEqual(await read_message(reader), (b'{"id":2}\n', False))
+        self.assertIsNone(await read_message(reader))
+
+    async def test_content_length_first(self):
+        reader = make_reader(framed(BODY, b"Content-Length: %d" % len(BODY)) + b'{"id":2}\n')
+        self.assertEqual(await read_message(reader), (BODY, True))
+        self.assertEqual(await read_message(reader), (b'{"id":2}\n', False))
+
+    async def test_content_type_before_content_length(self):
+        reader = make_reader(framed(BODY, b"Content-Type: application/json", b"content-length: %d" % len(BODY)))
+        self.assertEqual(await read_message(reader), (BODY, True))
+        self.assertIsNone(await read_message(reader))
+
+    async def test_missing_content_length_is_framed_error(self):
+        reader = make_reader(framed(b"", b"Content-Type: application/json") + b'{"id":2}\n')
+        body, is_framed = await read_message(reader)
+        self.assertTrue(is_framed)
+        self.assertEqual(body, b"Content-Type: application/json\r\n")
+        self.assertEqual(await read_message(reader), (b'{"id":2}\n', False))
+
+    async def test_out_of_range_content_length_is_framed_error(self):
+        for length in (b"-5", b"abc", str(STDIO_LINE_LIMIT + 1).encode()):
+            reader = make_reader(framed(b"", b"Content-Length: " + length))
+            body, is_framed = await read_message(reader)
+            self.assertTrue(is_framed)
+            self.assertEqual(body, b"Content-Length: " + length + b"\r\n")
+
+    async def test_truncated_body_is_eof(self):
+        reader = make_reader(framed(BODY[:10], b"Content-Length: %d" % len(BODY)))
+        self.assertIsNone(await read_message(reader))
+
+
+if __name__ == "__main__":
+    unittest.main()